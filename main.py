@@ -2,6 +2,9 @@ import sys
 import zipfile
 import rarfile
 import os
+import hashlib
+import struct
+import zlib
 from datetime import datetime
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QFont, QPixmap
@@ -12,6 +15,167 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QPushButton,
 from pypresence import Presence  # Import pypresence for Discord Rich Presence
 import time
 
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_stream(stream):
+    digest = hashlib.sha256()
+    crc = 0
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+    return digest.digest(), crc, size
+
+
+def is_encrypted(info):
+    if hasattr(info, 'needs_password'):  # rarfile.RarInfo
+        return info.needs_password()
+    return bool(info.flag_bits & 0x01)
+
+
+class DedupZipWriter:
+    # Writes members into an open ZipFile, reusing the compressed bytes of an
+    # earlier member with identical content instead of compressing it again.
+    # Candidates are found by (CRC, size) and confirmed with a SHA-256 digest.
+    def __init__(self, archive):
+        self.archive = archive
+        self.members = {}
+        self.digests = {}
+        self.reused = 0
+        self.skipped_bytes = 0
+        for info in archive.infolist():
+            self._index(info)
+
+    def _index(self, info, digest=None):
+        if info.is_dir() or is_encrypted(info):
+            return
+        self.members.setdefault((info.CRC, info.file_size), []).append(info)
+        if digest is not None:
+            self.digests[id(info)] = digest
+
+    def _digest(self, info):
+        if id(info) not in self.digests:
+            with self.archive.open(info) as member:
+                self.digests[id(info)] = hash_stream(member)[0]
+        return self.digests[id(info)]
+
+    def _find(self, digest, crc, size, compress_type):
+        for info in self.members.get((crc, size), []):
+            if info.compress_type == compress_type and self._digest(info) == digest:
+                return info
+        return None
+
+    def write(self, file_path, arcname):
+        with open(file_path, 'rb') as f:
+            digest, crc, size = hash_stream(f)
+        zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+        source = None if zinfo.is_dir() else self._find(digest, crc, size, self.archive.compression)
+        if source is None:
+            self.archive.write(file_path, arcname)
+            self._index(self.archive.infolist()[-1], digest)
+        else:
+            self._write_raw(zinfo, source)
+
+    def copy(self, old_archive, item):
+        # The source CRC and size are already known, so only collisions get hashed.
+        source = None
+        digest = None
+        if not item.is_dir() and (item.CRC, item.file_size) in self.members:
+            with old_archive.open(item) as member:
+                digest = hash_stream(member)[0]
+            source = self._find(digest, item.CRC, item.file_size, item.compress_type)
+        if source is None:
+            self.archive.writestr(item, old_archive.read(item.filename))
+            self._index(self.archive.infolist()[-1], digest)
+        else:
+            zinfo = zipfile.ZipInfo(item.filename, item.date_time)
+            zinfo.comment = item.comment
+            zinfo.extra = item.extra
+            zinfo.create_system = item.create_system
+            zinfo.external_attr = item.external_attr
+            zinfo.internal_attr = item.internal_attr
+            self._write_raw(zinfo, source)
+
+    def _write_raw(self, zinfo, source):
+        # zipfile has no public API for writing already-compressed data, so this
+        # mirrors ZipFile._open_to_write/_ZipWriteFile.close and depends on the
+        # ZipFile internals fp, start_dir, filelist, NameToInfo, _lock, _writing,
+        # _writecheck and _didModify (checked against CPython 3.11).
+        archive = self.archive
+        if archive._writing:
+            raise ValueError("Can't write to ZIP archive while an open writing handle exists")
+
+        with archive._lock:
+            fp = archive.fp
+            fp.seek(source.header_offset)
+            header = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+            if header[0] != zipfile.stringFileHeader:
+                raise zipfile.BadZipFile(f"Bad local file header for {source.filename}")
+            name_len, extra_len = header[-2], header[-1]
+            data_start = source.header_offset + zipfile.sizeFileHeader + name_len + extra_len
+
+            zinfo.compress_type = source.compress_type
+            zinfo.flag_bits = source.flag_bits & ~0x08  # sizes go in the local header, not a data descriptor
+            zinfo.CRC = source.CRC
+            zinfo.file_size = source.file_size
+            zinfo.compress_size = source.compress_size
+
+            fp.seek(archive.start_dir)
+            zinfo.header_offset = fp.tell()
+            archive._writecheck(zinfo)
+            archive._didModify = True
+            fp.write(zinfo.FileHeader())
+
+            write_pos = fp.tell()
+            remaining = source.compress_size
+            while remaining:
+                fp.seek(data_start)
+                chunk = fp.read(min(CHUNK_SIZE, remaining))
+                data_start += len(chunk)
+                remaining -= len(chunk)
+                fp.seek(write_pos)
+                fp.write(chunk)
+                write_pos += len(chunk)
+
+            archive.start_dir = fp.tell()
+            archive.filelist.append(zinfo)
+            archive.NameToInfo[zinfo.filename] = zinfo
+        self.reused += 1
+        self.skipped_bytes += source.file_size
+
+
+def find_duplicates(archive):
+    # Groups members by (CRC, size) from the central directory and only hashes
+    # the members that collide there. Encrypted members can't be hashed without
+    # a password, so they are skipped. Returns (groups, wasted_bytes).
+    candidates = {}
+    for info in archive.infolist():
+        if info.is_dir() or not info.file_size or is_encrypted(info):
+            continue
+        candidates.setdefault((info.CRC, info.file_size), []).append(info)
+
+    groups = []
+    wasted = 0
+    for infos in candidates.values():
+        if len(infos) < 2:
+            continue
+        by_digest = {}
+        for info in infos:
+            with archive.open(info) as member:
+                by_digest.setdefault(hash_stream(member)[0], []).append(info)
+        for same in by_digest.values():
+            if len(same) > 1:
+                groups.append([info.filename for info in same])
+                wasted += sum(info.file_size for info in same[1:])
+    groups.sort()
+    return groups, wasted
+
+
 class ContentViewer(QMainWindow):
     def __init__(self, filename, content):
         super().__init__()
@@ -193,6 +357,7 @@ class zipauraGUI(QWidget):
             ("Extract All", self.extract_all),
             ("Compress", self.compress_archive),
             ("Decompress", self.decompress_archive),
+            ("Duplicates", self.show_duplicates),
         ]
         
         self.toolbar_buttons = {}
@@ -324,9 +489,10 @@ class zipauraGUI(QWidget):
             try:
                 if self.archive_type == 'zip':
                     with zipfile.ZipFile(self.archive_file, 'a', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+                        writer = DedupZipWriter(archive)
                         for i, file_path in enumerate(files):
                             arcname = os.path.join(self.current_path, os.path.basename(file_path)).replace('\\', '/')
-                            archive.write(file_path, arcname)
+                            writer.write(file_path, arcname)
                             self.progress_bar.setValue(i + 1)
                 elif self.archive_type == 'rar':
                     with rarfile.RarFile(self.archive_file, 'a', compression=rarfile.RAR_M5) as archive:
@@ -335,6 +501,8 @@ class zipauraGUI(QWidget):
                             archive.write(file_path, arcname)
                             self.progress_bar.setValue(i + 1)
                 self.refresh_archive()
+                if self.archive_type == 'zip' and writer.reused:
+                    self.update_status(f"Reused {writer.reused} duplicate(s), skipped recompressing {writer.skipped_bytes / 1024:.2f} KB")
                 self.update_presence("Adding Files", os.path.basename(self.archive_file))
             except Exception as e:
                 self.show_message("Error", f"Failed to add files: {str(e)}", QMessageBox.Critical)
@@ -406,9 +574,10 @@ class zipauraGUI(QWidget):
             if self.archive_type == 'zip':
                 with zipfile.ZipFile(self.archive_file, 'r') as old_archive:
                     with zipfile.ZipFile(temp_file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as new_archive:
+                        writer = DedupZipWriter(new_archive)
                         for item in old_archive.infolist():
                             if item.filename not in files_to_remove:
-                                new_archive.writestr(item, old_archive.read(item.filename))
+                                writer.copy(old_archive, item)
             elif self.archive_type == 'rar':
                 with rarfile.RarFile(self.archive_file, 'r') as old_archive:
                     with rarfile.RarFile(temp_file, 'w', compression=rarfile.RAR_M5) as new_archive:
@@ -435,8 +604,9 @@ class zipauraGUI(QWidget):
                     self.progress_bar.setVisible(True)
                     self.progress_bar.setMaximum(len(old_archive.infolist()))
                     with zipfile.ZipFile(temp_file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as new_archive:
+                        writer = DedupZipWriter(new_archive)
                         for i, item in enumerate(old_archive.infolist()):
-                            new_archive.writestr(item, old_archive.read(item.filename))
+                            writer.copy(old_archive, item)
                             self.progress_bar.setValue(i + 1)
             elif self.archive_type == 'rar':
                 with rarfile.RarFile(self.archive_file, 'r') as old_archive:
@@ -449,7 +619,10 @@ class zipauraGUI(QWidget):
             os.remove(self.archive_file)
             os.rename(temp_file, self.archive_file)
             self.refresh_archive()
-            self.show_message("Success", "Archive compressed to maximum level")
+            message = "Archive compressed to maximum level"
+            if self.archive_type == 'zip' and writer.reused:
+                message += f"\nReused {writer.reused} duplicate(s), skipped recompressing {writer.skipped_bytes / 1024:.2f} KB"
+            self.show_message("Success", message)
             self.update_presence("Compressing Archive", os.path.basename(self.archive_file))
         except Exception as e:
             self.show_message("Error", f"Failed to compress archive: {str(e)}", QMessageBox.Critical)
@@ -475,6 +648,26 @@ class zipauraGUI(QWidget):
             except Exception as e:
                 self.show_message("Error", f"Failed to decompress archive: {str(e)}", QMessageBox.Critical)
 
+    def show_duplicates(self):
+        if not self.archive_file:
+            self.show_message("Error", "No archive loaded", QMessageBox.Warning)
+            return
+
+        try:
+            archive_class = zipfile.ZipFile if self.archive_type == 'zip' else rarfile.RarFile
+            with archive_class(self.archive_file, 'r') as archive:
+                groups, wasted = find_duplicates(archive)
+            if not groups:
+                self.show_message("Duplicates", "No duplicate files found")
+            else:
+                lines = [f"{len(groups)} duplicate group(s), {wasted / 1024:.2f} KB wasted", ""]
+                for group in groups:
+                    lines.append(", ".join(group))
+                self.show_message("Duplicates", "\n".join(lines))
+            self.update_presence("Finding Duplicates", os.path.basename(self.archive_file))
+        except Exception as e:
+            self.show_message("Error", f"Failed to find duplicates: {str(e)}", QMessageBox.Critical)
+
     def handle_double_click(self, index):
         if not self.archive_file:
             print("No archive loaded")